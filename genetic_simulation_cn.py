@@ -1,7 +1,54 @@
-import re
-import random
-from collections import defaultdict
-from copy import deepcopy
+import heapq
+import sys
+import numpy as np
+from collections import Counter
+
+# ====================
+#   可选加速模块（安装了numba时启用）
+# ====================
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+if HAS_NUMBA:
+    # numba的随机数状态按线程保存，只有单线程执行时seed才能保证结果可复现，
+    # 因此不使用parallel；nogil让图形界面的后台繁殖线程不占用GIL
+    @njit(cache=True, nogil=True)
+    def _random_genotypes_kernel(out, gene_chars, seed):
+        """随机生成个体，out为(个体数, 基因长度)的字符编码数组"""
+        np.random.seed(seed)
+        for i in range(out.shape[0]):
+            for j in range(out.shape[1] // 2):
+                g = np.random.randint(0, gene_chars.shape[0])
+                a = gene_chars[g, np.random.randint(0, 2)]
+                b = gene_chars[g, np.random.randint(0, 2)]
+                # 大写字母编码更小，显性基因排在前面
+                if a <= b:
+                    out[i, 2*j], out[i, 2*j+1] = a, b
+                else:
+                    out[i, 2*j], out[i, 2*j+1] = b, a
+
+    @njit(cache=True, nogil=True)  # 同样单线程执行，保证seed可复现
+    def _create_children_kernel(parents1, parents2, recessive, seed):
+        """为每对亲本抽取配子组成子代，隐性基因在前且另一个不是隐性时交换"""
+        np.random.seed(seed)
+        pair_count, length = parents1.shape
+        children = np.empty_like(parents1)
+        for i in range(pair_count):
+            for locus in range(0, length, 2):
+                a = parents1[i, locus + np.random.randint(0, 2)]
+                b = parents2[i, locus + np.random.randint(0, 2)]
+                a_rec = False
+                b_rec = False
+                for r in recessive:
+                    a_rec |= a == r
+                    b_rec |= b == r
+                if a_rec and not b_rec:
+                    a, b = b, a
+                children[i, locus], children[i, locus+1] = a, b
+        return children
 
 # ====================
 #   基因定义模块
@@ -64,11 +111,34 @@ class GeneComposition:
 # ====================
 class SimulationGroup:
     def __init__(self):
-        self.current_generation = []
+        self._current_generation = Counter()  # 当前代 {基因型: 个体数}
         self.gene_structure = []  # 存储基因定义顺序
         self.gene_length = 0      # 每个个体的基因长度
         self.experiment_mode = 'random'  # 实验模式：random/cross
         self.breed_history = []   # 繁殖历史记录
+        self._stats_version = 0   # 当前代每次变化时递增
+        self._stats_cache = None  # 统计结果缓存
+        self._stats_key = None
+
+    @property
+    def current_generation(self):
+        """当前代 {基因型: 个体数}"""
+        return self._current_generation
+
+    @current_generation.setter
+    def current_generation(self, generation):
+        self._current_generation = Counter(generation)
+        self._stats_version += 1
+
+    @property
+    def total(self):
+        """当前代个体总数"""
+        return sum(self._current_generation.values())
+
+    @property
+    def stats_version(self):
+        """当前代的版本号，用于判断统计结果是否过期"""
+        return self._stats_version
 
     def initialize_structure(self, genes_str, genes_dict):
         """初始化基因结构"""
@@ -90,73 +160,99 @@ class SimulationGroup:
 
     def add_organism(self, genes_str, genes_dict):
         """添加个体到当前代"""
+        self.add_organisms_bulk(genes_str, 1, genes_dict)
+
+    def add_organisms_bulk(self, genes_str, count, genes_dict, validated=False):
+        """批量添加同一基因型的个体，只验证一次（调用方已验证时传入validated=True）"""
+        if count <= 0:
+            return
+        
         # 首次添加时初始化结构
         if not self.current_generation:
             self.initialize_structure(genes_str, genes_dict)
         
         # 验证基因型
-        GeneComposition(genes_str, genes_dict)
+        if not validated:
+            GeneComposition(genes_str, genes_dict)
         
         if len(genes_str) != self.gene_length:
             raise ValueError(f"基因长度不符，要求长度：{self.gene_length}")
             
-        self.current_generation.append(genes_str)
+        # 基因型驻留为同一个字符串对象，字典查找可直接按地址命中
+        self.current_generation[sys.intern(genes_str)] += count
+        self._stats_version += 1
+
+    def remove_organisms(self, genes_str, count):
+        """删除指定数量的某基因型个体，数量不足时报错且不做任何修改"""
+        if count <= 0:
+            return
+        current_count = self._current_generation[genes_str]
+        if current_count < count:
+            raise ValueError(f"数量不足，当前存在 {current_count} 个")
+        if current_count > count:
+            self._current_generation[genes_str] = current_count - count
+        else:
+            del self._current_generation[genes_str]
+        self._stats_version += 1
 
 
 
     def get_statistics(self, genes_dict, details=False):
-        """获取统计信息"""
+        """获取统计信息（当前代未变化时直接返回缓存）"""
+        key = (self._stats_version, details)
+        # 含详细信息的结果同样可以满足不需要详细信息的查询
+        if self._stats_key == key or self._stats_key == (self._stats_version, True):
+            return self._stats_cache
+        
+        # 等位基因字符 → 基因定义，免去逐基因座的upper()转换
+        allele_genes = {}
+        for gene in genes_dict.values():
+            allele_genes[gene.dominant] = gene
+            allele_genes[gene.recessive] = gene
+        
+        # 先按基因型计数，表型只需对每种基因型分析一次
+        genotype_counts = self.current_generation
+        phenotypes = {}
+        pheno_counts = {}
+        pheno_genos = {}
+        for geno, count in genotype_counts.items():
+            pheno_key = tuple(allele_genes[geno[i]].get_phenotype(geno[i:i+2])
+                              for i in range(0, len(geno), 2))
+            phenotypes[geno] = pheno_key
+            pheno_counts[pheno_key] = pheno_counts.get(pheno_key, 0) + count
+            # 每种基因型只出现一次，列表天然不重复
+            pheno_genos.setdefault(pheno_key, []).append(geno)
+        
+        # 计算比率
+        total = self.total
         stats = {
-            'total': len(self.current_generation),
-            'genotypes': defaultdict(int),
-            'phenotypes': defaultdict(lambda: {'count':0, 'genotypes':set()}),
+            'total': total,
+            'genotypes': {
+                geno: {'count': count, 'ratio': count / total if total >0 else 0}
+                for geno, count in genotype_counts.items()
+            },
+            'phenotypes': {
+                pheno: {'count': count, 'genotypes': pheno_genos[pheno],
+                        'ratio': count / total if total >0 else 0}
+                for pheno, count in pheno_counts.items()
+            },
             'details': []
         }
         
-        for geno in self.current_generation:
-            # 基因型统计
-            stats['genotypes'][geno] += 1
-            
-            # 表型分析
-            phenotype = []
-            for i in range(0, len(geno), 2):
-                gene_symbol = geno[i].upper()
-                gene = genes_dict[gene_symbol]
-                phenotype.append(gene.get_phenotype(geno[i:i+2]))
-            
-            pheno_key = tuple(phenotype)
-            stats['phenotypes'][pheno_key]['count'] += 1
-            stats['phenotypes'][pheno_key]['genotypes'].add(geno)
-        
-        # 计算比率
-        total = stats['total']
-        for geno in stats['genotypes']:
-            stats['genotypes'][geno] = {
-                'count': stats['genotypes'][geno],
-                'ratio': stats['genotypes'][geno] / total if total >0 else 0
-            }
-            
-        for pheno in stats['phenotypes']:
-            stats['phenotypes'][pheno]['ratio'] = stats['phenotypes'][pheno]['count'] / total if total >0 else 0
-            stats['phenotypes'][pheno]['genotypes'] = list(stats['phenotypes'][pheno]['genotypes'])
-        
         # 生成详细信息
         if details:
             for geno in stats['genotypes']:
-                traits = []
-                for i in range(0, len(geno), 2):
-                    gene_symbol = geno[i].upper()
-                    gene = genes_dict[gene_symbol]
-                    traits.append(gene.get_phenotype(geno[i:i+2]))
                 stats['details'].append({
                     'genotype': geno,
-                    'traits': ', '.join(traits),
+                    'traits': ', '.join(phenotypes[geno]),
                     'count': stats['genotypes'][geno]['count'],
                     'ratio': stats['genotypes'][geno]['ratio']
                 })
             # 按数量排序
             stats['details'].sort(key=lambda x: -x['count'])
         
+        self._stats_cache = stats
+        self._stats_key = key
         return stats
 
     def set_experiment_mode(self, mode):
@@ -169,79 +265,66 @@ class SimulationGroup:
     
     def breed(self, genes_dict):
         """执行繁殖逻辑（允许相同基因型杂交）"""
-        if len(self.current_generation) < 2:
+        parent_count = self.total
+        if parent_count < 2:
             raise ValueError("至少需要两个亲本进行繁殖")
     
-        next_gen = []
-        parents = self.current_generation.copy()
+        # 每种基因型只编码一次，个体通过基因型序号引用
+        genotypes = list(self.current_generation)
+        codes = self._encode(genotypes)
+        members = np.repeat(np.arange(len(genotypes)), list(self.current_generation.values()))
+        pair_count = parent_count // 2
     
+        # 打乱后相邻两两配对
+        order = members[np.random.permutation(parent_count)]
+        first = order[0:pair_count*2:2]
+        second = order[1:pair_count*2:2]
         if self.experiment_mode == 'cross':
-            # 改进的杂交模式：允许相同基因型配对
-            parent_groups = defaultdict(list)
-            for p in parents:
-                parent_groups[p].append(p)
-        
-            pairs = []
-            keys = list(parent_groups.keys())
-        
-            # 生成所有可能的配对组合（包括相同基因型）
-            for i in range(len(keys)):
-                # 不同基因型配对
-                for j in range(i+1, len(keys)):
-                    pairs.extend(zip(parent_groups[keys[i]], parent_groups[keys[j]]))
-                # 相同基因型配对（至少需要2个个体）
-                same_type = parent_groups[keys[i]]
-                while len(same_type) >= 2:
-                    pairs.append((same_type.pop(), same_type.pop()))
-        
-            random.shuffle(pairs)
-            for p1, p2 in pairs[:len(parents)//2]:  # 保持种群规模稳定
-                child = self._create_child(p1, p2, genes_dict)
-                next_gen.append(child)
-        else:
-            # 原有自然随机交配模式保持不变
-            random.shuffle(parents)
-            for i in range(0, len(parents)//2*2, 2):
-                p1 = parents[i]
-                p2 = parents[i+1]
-                child = self._create_child(p1, p2, genes_dict)
-                next_gen.append(child)
+            # 杂交模式：优先不同基因型配对。相同基因型的配对按基因型排序后
+            # 错开半圈交换配偶；无法避开时（某基因型过半）仍允许相同基因型杂交
+            same = np.flatnonzero(first == second)
+            if len(same) > 1:
+                same = same[np.argsort(first[same], kind='stable')]
+                second[same] = np.roll(second[same], len(same) // 2)
+        parents1 = codes[first]
+        parents2 = codes[second]
     
+        children = self._create_children(parents1, parents2, genes_dict)
         self.breed_history.append({
-            'parent_count': len(parents),
-            'child_count': len(next_gen)
+            'parent_count': parent_count,
+            'child_count': sum(children.values())
         })
-        self.current_generation = next_gen
-
-    def _create_child(self, p1, p2, genes_dict):
-        child_genes = []
-        # 按基因座独立处理
-        for locus in range(0, len(p1), 2):
-            gene_symbol = p1[locus].upper()
-            gene = genes_dict[gene_symbol]
-        
-            # 分别从父母获取当前基因座的等位基因
-            p1_alleles = [p1[locus], p1[locus+1]]
-            p2_alleles = [p2[locus], p2[locus+1]]
+        self.current_generation = children
+
+    def _encode(self, genotypes):
+        """基因型字符串 → (个体数, 基因长度) 的码位矩阵"""
+        codes = np.array(genotypes, dtype=f'U{self.gene_length}').view(np.uint32)
+        return codes.reshape(len(genotypes), self.gene_length)
+
+    def _create_children(self, parents1, parents2, genes_dict):
+        """对所有亲本对同时进行配子抽样"""
+        pair_count, length = parents1.shape
+        if pair_count == 0:
+            return Counter()
+        recessive = np.array([ord(gene.recessive) for gene in genes_dict.values()], dtype=np.uint32)
+        if HAS_NUMBA:
+            children = _create_children_kernel(parents1, parents2, recessive, np.random.randint(0, 2**31 - 1))
+        else:
+            rows = np.arange(pair_count)[:, None]
+            loci = np.arange(0, length, 2)
         
-            # 独立选择配子（修复关键点）
-            gamete1 = random.choice(p1_alleles)
-            gamete2 = random.choice(p2_alleles)
+            # 每个基因座独立地从父母各随机取一个等位基因
+            gamete1 = parents1[rows, loci + np.random.randint(0, 2, size=(pair_count, len(loci)))]
+            gamete2 = parents2[rows, loci + np.random.randint(0, 2, size=(pair_count, len(loci)))]
         
-            # 移除显性排序，保持随机顺序
-            child_genes.extend([gamete1, gamete2])  # 不再排序
-    
-        # 按基因结构排序（保持基因顺序）
-        sorted_genes = []
-        for i in range(0, len(child_genes), 2):
-            gene_symbol = child_genes[i].upper()
-            gene = genes_dict[gene_symbol]
-            # 仅在同一基因座内排序
-            alleles = sorted([child_genes[i], child_genes[i+1]], 
-                       key=lambda x: x == gene.recessive)
-            sorted_genes.extend(alleles)
-    
-        return ''.join(sorted_genes)
+            # 仅在同一基因座内排序：隐性基因在前且另一个不是隐性时交换
+            swap = np.isin(gamete1, recessive) & ~np.isin(gamete2, recessive)
+            children = np.empty_like(parents1)
+            children[:, 0::2] = np.where(swap, gamete2, gamete1)
+            children[:, 1::2] = np.where(swap, gamete1, gamete2)
+        # 直接按基因型汇总，不为每个子代生成字符串
+        genotypes, counts = np.unique(np.ascontiguousarray(children).view(f'U{length}').ravel(), return_counts=True)
+        return Counter(dict(zip(map(sys.intern, genotypes.tolist()), counts.tolist())))
 
 
 # ====================
@@ -252,73 +335,79 @@ class GeneticSimulationSystem:
         self.genes = {}  # {symbol: Gene}
         self.groups = {}  # {group_name: SimulationGroup}
         self.current_group = None
+        self._genes_version = 0  # 基因定义每次变化时递增
+        self._valid_genotypes = set()  # 当前基因定义下已验证通过的基因型
+        self._valid_genotypes_version = 0
+        self._gene_chars = None  # 随机生成用的 [显性, 隐性] 字符编码表
+        self._gene_chars_version = None
+        # 指令 → 处理方法
+        self._dispatch = {
+            '/help': self.show_help,
+            '/add': self.add_gene,
+            '/create': self.create_group,
+            '/read': self.read_group,
+            '/list': self.list_groups,
+            '/show': self.show_group,
+            '/run': self.run_simulation,
+            '/write': self.write_simulation,
+            '/change': self.change_composition,
+            '/random': self.random_generate,
+            '/load': self.load_commands,
+            '/mode': self.set_experiment_mode,
+            '/runs': self.run_for_times,
+        }
+
+    @property
+    def genes_version(self):
+        """基因定义的版本号，用于判断界面是否需要刷新"""
+        return self._genes_version
     
     def process_command(self, cmd):
         cmd = cmd.strip()
         if not cmd:
             return
         
-        parts = re.split(r'\s+', cmd)
-        instruction = parts[0].lower()
+        self._execute(cmd.split())
+    
+    def _execute(self, parts):
+        """执行已分词的指令"""
+        handler = self._dispatch.get(parts[0].lower())
+        if handler is None:
+            print("未知指令，输入/help查看帮助")
+            return
         
         try:
-            if instruction == '/help':
-                self.show_help()
-            elif instruction == '/add':
-                self.add_gene(parts[1:])
-            elif instruction == '/delete':
-                self.delete_gene(parts[1:])
-            elif instruction == '/create':
-                self.create_group(parts[1:])
-            elif instruction == '/read':
-                self.read_group(parts[1:])
-            elif instruction == '/save':
-                self.save_group(parts[1:])
-            elif instruction == '/list':
-                self.list_groups(parts[1:])
-            elif instruction == '/show':
-                self.show_group(parts[1:])
-            elif instruction == '/run':
-                self.run_simulation(parts[1:])
-            elif instruction == '/write':
-                self.write_simulation(parts[1:])
-            elif instruction == '/change':
-                self.change_composition(parts[1:])
-            elif instruction == '/random':
-                self.random_generate(parts[1:])
-                return;
-            elif instruction == '/load':
-                self.load_commands(parts[1:])
-                return;
-            elif instruction == '/mode':
-                self.set_experiment_mode(parts[1:])
-                return;
-            elif instruction == '/runs':
-                self.run_for_times(parts[1:])
-                return;
-            else:
-                print("未知指令，输入/help查看帮助")
+            handler(parts[1:])
         except Exception as e:
             print(f"错误：{str(e)}")
     
-    def show_help(self):
+    def _validate_genotype(self, genotype):
+        """验证基因型，通过的结果按基因定义版本缓存"""
+        if self._valid_genotypes_version != self._genes_version:
+            self._valid_genotypes.clear()
+            self._valid_genotypes_version = self._genes_version
+        if genotype not in self._valid_genotypes:
+            GeneComposition(genotype, self.genes)
+            self._valid_genotypes.add(genotype)
+    
+    def show_help(self, args=None):
         help_text = """
 === 遗传模拟系统指令手册 ===
 /help - 显示本帮助信息
 /add <显性基因> <隐性基因> <显性性状> <隐性性状> - 添加新基因定义
-/delete <基因符号> - 删除已定义基因
+/delete <基因符号> - 删除已定义基因（暂未实现）
 /create <组名> - 创建新模拟组
 /read <组名> - 切换到指定组
-/save <组名> - 保存当前状态到组
+/save <组名> - 保存当前状态到组（暂未实现）
 /list [组名] - 列出所有组或组内个体
-/show <组名> [-details] - 显示统计信息
-/run <组名> - 执行一代繁殖并显示结果
-/write <组名> - 执行繁殖并覆盖当前组
+/show <组名> [-details] [-top N] - 显示统计信息（-top只显示数量最多的前N项）
+/run <组名> [-q] - 执行一代繁殖并显示结果（-q不显示统计）
+/write <组名> [-q] - 执行繁殖并覆盖当前组
 /change <组名> <基因型> <add/del> <数量> - 修改组成
 /random <组名> <数量> <基因长度> - 随机生成个体
-/load <文件路径> - 逐行读取指定文件里的指令并执行
+/load <文件路径> [-v] - 逐行读取指定文件里的指令并执行（-v显示每行进度）
 /mode <组名> <cross|random> - 设置当前组别的类型
-/runs <轮数> - 执行繁殖指定轮数次
+/runs <轮数> [--every K] - 执行繁殖指定轮数次（--every每隔K代显示一次统计）
 /exit - 退出当前程序
 
 * 基因符号规则：
@@ -336,23 +425,29 @@ class GeneticSimulationSystem:
     def run_for_times(self, args):
         try:
             count=int(args[0])
+            every = int(args[args.index('--every') + 1]) if '--every' in args[1:] else max(count, 1)
+            if every <= 0:
+                raise ValueError
         except:
             print("不正确的参数")
             return;
+        # 中间各代默认不输出，只在最后一代（及每隔every代）显示统计
         for i in range(count):
-            system.process_command("/run")
+            if not self.run_simulation([], quiet=i < count - 1 and (i + 1) % every != 0):
+                return
 
     def set_experiment_mode(self, args):
         if len(args) < 2:
             raise ValueError("格式：/mode <组名> <cross|random>")
         group_name, mode = args[0], args[1]
         
-        if group_name not in self.groups:
+        group = self.groups.get(group_name)
+        if group is None:
             raise ValueError("组别不存在")
         if mode not in ['cross', 'random']:
             raise ValueError("模式必须是cross或random")
             
-        self.groups[group_name].set_experiment_mode(mode)
+        group.set_experiment_mode(mode)
         print(f"已设置{group_name}组为{mode}模式")
     def show_group(self, args):
         """完善统计显示功能"""
@@ -361,36 +456,49 @@ class GeneticSimulationSystem:
 
         group_name = args[0]
         details = '-details' in args[1:]
+        top = None
+        if '-top' in args[1:]:
+            i = args.index('-top', 1)
+            try:
+                top = int(args[i + 1])
+            except (IndexError, ValueError):
+                top = 0
+            if top <= 0:
+                raise ValueError("-top 后需要跟正整数")
 
-        if group_name not in self.groups:
+        group = self.groups.get(group_name)
+        if group is None:
             raise ValueError("组别不存在")
 
-        group = self.groups[group_name]
         stats = group.get_statistics(self.genes, details=details)
 
-        print(f"\n=== {group_name} 统计 ===")
-        print(f"总个体数：{stats['total']}")
+        def by_count(items):
+            """按数量从多到少排列，指定-top时只取前N项"""
+            if top is None:
+                return sorted(items, key=lambda x: -x[1]['count'])
+            return heapq.nlargest(top, items, key=lambda x: x[1]['count'])
+
+        lines = [f"\n=== {group_name} 统计 ===", f"总个体数：{stats['total']}"]
         
         # 基因型分布
-        print("\n基因型分布：")
-        for geno, info in sorted(stats['genotypes'].items(), 
-                               key=lambda x: -x[1]['count']):
-            print(f"  {geno}: {info['count']} ({info['ratio']*100:.2f}%)")
+        lines.append("\n基因型分布：")
+        for geno, info in by_count(stats['genotypes'].items()):
+            lines.append(f"  {geno}: {info['count']} ({info['ratio']*100:.2f}%)")
 
         # 表型分布
-        print("\n表型分布：")
-        for pheno, info in sorted(stats['phenotypes'].items(),
-                                key=lambda x: -x[1]['count']):
-            print(f"  {pheno}:")
-            print(f"    数量：{info['count']} 占比：{info['ratio']*100:.2f}%")
+        lines.append("\n表型分布：")
+        for pheno, info in by_count(stats['phenotypes'].items()):
+            lines.append(f"  {pheno}:")
+            lines.append(f"    数量：{info['count']} 占比：{info['ratio']*100:.2f}%")
             if details:
-                print(f"    基因型：{', '.join(info['genotypes'])}")
+                lines.append(f"    基因型：{', '.join(info['genotypes'])}")
 
         # 详细模式
         if details:
-            print("\n详细性状组合：")
-            for detail in stats.get('details', []):
-                print(f"  {detail['genotype']} → {detail['traits']}")
+            lines.append("\n详细性状组合：")
+            for detail in stats.get('details', [])[:top]:  # details已按数量排好序
+                lines.append(f"  {detail['genotype']} → {detail['traits']}")
+        self._write_lines(lines)
 
     def add_gene(self, args):
         if len(args) != 4:
@@ -403,6 +511,7 @@ class GeneticSimulationSystem:
         
         new_gene = Gene(dom, rec, dom_t, rec_t)
         self.genes[gene_symbol] = new_gene
+        self._genes_version += 1
         print(f"成功添加基因：{gene_symbol}（显性：{dom_t}，隐性：{rec_t}）")
     def load_commands(self, args):
         """处理/load指令：从文件读取命令批量执行"""
@@ -410,36 +519,56 @@ class GeneticSimulationSystem:
             raise ValueError("需要指定文件路径，格式：/load <文件路径>")
 
         file_path = args[0]
-        line_num = 0
+        verbose = '-v' in args[1:]
         
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
-                print(f"\n=== 开始执行指令文件：{file_path} ===")
-                
-                for line_num, line in enumerate(f, 1):
-                    # 清理行内容并跳过空行/注释
-                    clean_line = line.strip()
-                    if not clean_line or clean_line.startswith('#'):
-                        continue
-                    
-                    # 显示执行进度
-                    print(f"\n[行{line_num}] 执行: {clean_line}")
-                    
-                    try:
-                        self.process_command(clean_line)
-                    except Exception as e:
-                        print(f"!! 行{line_num}执行失败: {str(e)}")
-                        # 可选：是否继续执行后续命令
-                        # raise  # 如果要中断执行则取消注释
-                
-                print(f"\n=== 文件执行完成，共处理 {line_num} 行 ===")
-
+                lines = f.read().splitlines()
         except FileNotFoundError:
             raise ValueError(f"文件不存在：{file_path}")
         except UnicodeDecodeError:
             raise ValueError("文件编码错误，请使用UTF-8编码")
         except Exception as e:
             raise ValueError(f"文件读取失败：{str(e)}")
+        
+        # 预先分词；连续对同一组同一基因型的add合并为一次添加
+        commands = []
+        for line_num, line in enumerate(lines, 1):
+            # 清理行内容并跳过空行/注释
+            clean_line = line.strip()
+            if not clean_line or clean_line.startswith('#'):
+                continue
+            parts = clean_line.split()
+            merged = self._merge_change_add(commands[-1][1], parts) if commands else None
+            if merged:
+                commands[-1] = (commands[-1][0], merged)
+            else:
+                commands.append((line_num, parts))
+        
+        print(f"\n=== 开始执行指令文件：{file_path} ===")
+        for line_num, parts in commands:
+            # 显示执行进度（-v）
+            if verbose:
+                print(f"\n[行{line_num}] 执行: {' '.join(parts)}")
+            
+            try:
+                self._execute(parts)
+            except Exception as e:
+                print(f"!! 行{line_num}执行失败: {str(e)}")
+                # 可选：是否继续执行后续命令
+                # raise  # 如果要中断执行则取消注释
+        
+        print(f"\n=== 文件执行完成，共处理 {len(lines)} 行 ===")
+
+    def _merge_change_add(self, previous, parts):
+        """两条 /change <组名> <基因型> add <数量> 指向同一组同一基因型时合并数量"""
+        if (len(previous) == len(parts) == 5
+                and previous[0].lower() == parts[0].lower() == '/change'
+                and previous[3] == parts[3] == 'add'
+                and previous[1:3] == parts[1:3]
+                and previous[4].isdigit() and parts[4].isdigit()):
+            return previous[:4] + [str(int(previous[4]) + int(parts[4]))]
+        return None
 
 
     def create_group(self, args):
@@ -465,7 +594,10 @@ class GeneticSimulationSystem:
         self.current_group = group_name
         print(f"已切换到组别：{group_name}")
 
-    def run_simulation(self, args):
+    def run_simulation(self, args, *, quiet=False):
+        if '-q' in args:
+            quiet = True
+            args = [arg for arg in args if arg != '-q']
         if len(args) < 1:
             if not self.current_group:
                 raise ValueError("需要指定组别")
@@ -474,85 +606,113 @@ class GeneticSimulationSystem:
             group_name = args[0]
         
         group = self.groups.get(group_name)
-        if not group:
+        if group is None:
             raise ValueError("组别不存在")
         
         try:
-            original = len(group.current_generation)
+            original = group.total
             group.breed(self.genes)
-            new_count = len(group.current_generation)
-            
-            print(f"\n=== 第{group_name}组繁殖结果 ===")
-            print(f"亲代数量：{original} → 子代数量：{new_count}")
-            print("注意：繁殖后亲代将被替换为子代")
-            
-            stats = group.get_statistics(self.genes)
-            self._display_stats(stats)
-            
         except ValueError as e:
             print(f"繁殖失败：{str(e)}")
+            return False
+        
+        if not quiet:
+            new_count = group.total
+            lines = [f"\n=== 第{group_name}组繁殖结果 ===",
+                     f"亲代数量：{original} → 子代数量：{new_count}",
+                     "注意：繁殖后亲代将被替换为子代"]
+            
+            stats = group.get_statistics(self.genes)
+            self._write_lines(lines + self._stats_lines(stats))
+        return True
 
     def write_simulation(self, args):
         self.run_simulation(args)
         print("已更新当前组状态")
 
+    def _gene_chars_table(self):
+        """返回各基因显隐性字符编码表，基因定义不变时复用"""
+        if self._gene_chars_version != self._genes_version:
+            self._gene_chars = np.array([[ord(gene.dominant), ord(gene.recessive)]
+                                         for gene in self.genes.values()], dtype=np.uint32)
+            self._gene_chars_version = self._genes_version
+        return self._gene_chars
+
     def random_generate(self, args):
         if len(args) < 3:
             raise ValueError("参数不足，格式：/random <组名> <数量> <基因长度>")
         
         group_name, amount, length = args[0], int(args[1]), int(args[2])
         group = self.groups.get(group_name)
-        if not group:
+        if group is None:
             raise ValueError("组别不存在")
         
-        if length % 2 != 0:
-            raise ValueError("基因长度必须为偶数")
+        if amount < 0:
+            raise ValueError("生成数量不能为负数")
+        
+        if length <= 0 or length % 2 != 0:
+            raise ValueError("基因长度必须为正偶数")
         
-        existing_genes = list(self.genes.keys())
-        if not existing_genes:
+        if not self.genes:
             raise ValueError("请先定义基因")
         
-        for _ in range(amount):
-            genes = []
-            for _ in range(length//2):
-                gene = random.choice(existing_genes)
-                alleles = [self.genes[gene].dominant, self.genes[gene].recessive]
-                pair = random.choices(alleles, k=2)
-                genes.extend(sorted(pair, key=lambda x: x.isupper(), reverse=True))
-            group.add_organism(''.join(genes), self.genes)
+        gene_chars = self._gene_chars_table()
+        if HAS_NUMBA:
+            alleles = np.empty((amount, length), dtype=np.uint32)
+            _random_genotypes_kernel(alleles, gene_chars, np.random.randint(0, 2**31 - 1))
+        else:
+            # 一次性抽取所有个体每个基因座的基因及两个等位基因（0为显性，1为隐性）
+            gene_idx = np.random.randint(0, len(gene_chars), size=(amount, length//2))
+            allele_bits = np.random.randint(0, 2, size=(amount, length//2, 2))
+            pairs = gene_chars[gene_idx[..., None], allele_bits]
+            # 大写字母编码更小，直接比较字符编码即可让显性基因排在前面
+            alleles = np.empty_like(pairs)
+            np.minimum(pairs[..., 0], pairs[..., 1], out=alleles[..., 0])
+            np.maximum(pairs[..., 0], pairs[..., 1], out=alleles[..., 1])
+            alleles = alleles.reshape(amount, length)
+        genotypes = alleles.view(f'U{length}').ravel().tolist()
+        
+        # 相同基因型合并后批量添加
+        for genotype, count in Counter(genotypes).items():
+            self._validate_genotype(genotype)
+            group.add_organisms_bulk(genotype, count, self.genes, validated=True)
         
         print(f"成功生成{amount}个随机个体")
 
-    def _display_stats(self, stats):
-        print("\n基因型分布：")
+    def _stats_lines(self, stats):
+        lines = ["\n基因型分布："]
         for geno, info in stats['genotypes'].items():
-            print(f"{geno}: {info['count']} ({info['ratio']*100:.2f}%)")
+            lines.append(f"{geno}: {info['count']} ({info['ratio']*100:.2f}%)")
         
-        print("\n表型分布：")
+        lines.append("\n表型分布：")
         for pheno, info in stats['phenotypes'].items():
-            print(f"{pheno}: {info['count']} ({info['ratio']*100:.2f}%)")
+            lines.append(f"{pheno}: {info['count']} ({info['ratio']*100:.2f}%)")
+        return lines
+
+    def _write_lines(self, lines):
+        """把多行输出拼接后一次性写出"""
+        sys.stdout.write('\n'.join(lines) + '\n')
+
     def list_groups(self, args):
         """完善列表显示功能"""
         try:
             if not args:
-                print("\n当前组别列表:")
-                for name in self.groups:
+                lines = ["\n当前组别列表:"]
+                for name, group in self.groups.items():
                     status = "(当前)" if name == self.current_group else ""
-                    count = len(self.groups[name].current_generation)
-                    print(f"  {name} {status} 个体数：{count}")
+                    lines.append(f"  {name} {status} 个体数：{group.total}")
+                self._write_lines(lines)
                 return
 
             group_name = args[0]
-            if group_name not in self.groups:
+            group = self.groups.get(group_name)
+            if group is None:
                 raise ValueError("组别不存在")
 
-            group = self.groups[group_name]
-            print(f"\n组别 [{group_name}] 成员列表（共{len(group.current_generation)}个）:")
-            counter = defaultdict(int)
-            for geno in group.current_generation:
-                counter[geno] += 1
-            for i, (geno, count) in enumerate(counter.items(), 1):
-                print(f"{i}. {geno} ×{count}")
+            lines = [f"\n组别 [{group_name}] 成员列表（共{group.total}个）:"]
+            lines.extend(f"{i}. {geno} ×{count}"
+                         for i, (geno, count) in enumerate(group.current_generation.items(), 1))
+            self._write_lines(lines)
 
         except IndexError:
             raise ValueError("缺少组名参数")
@@ -567,13 +727,13 @@ class GeneticSimulationSystem:
         amount = int(args[3])
 
         # 获取目标组
-        if group_name not in self.groups:
+        group = self.groups.get(group_name)
+        if group is None:
             raise ValueError(f"组别 {group_name} 不存在")
-        group = self.groups[group_name]
 
         # 验证基因型
         try:
-            GeneComposition(genotype, self.genes)
+            self._validate_genotype(genotype)
         except ValueError as e:
             raise ValueError(f"无效基因型: {str(e)}")
 
@@ -583,14 +743,10 @@ class GeneticSimulationSystem:
 
         # 执行操作
         if operation == 'add':
-            for _ in range(amount):
-                group.add_organism(genotype, self.genes)
+            group.add_organisms_bulk(genotype, amount, self.genes, validated=True)
             print(f"成功添加 {amount} 个个体")
         elif operation == 'del':
-            current_count = group.current_generation.count(genotype)
-            if current_count < amount:
-                raise ValueError(f"数量不足，当前存在 {current_count} 个")
-            group.current_generation = [g for g in group.current_generation if g != genotype][:len(group.current_generation)-amount]
+            group.remove_organisms(genotype, amount)
             print(f"成功删除 {amount} 个个体")
         else:
             raise ValueError("操作类型必须是 add 或 del")
@@ -604,6 +760,24 @@ if __name__ == "__main__":
     print("=== 遗传模拟系统 ===")
     print("输入/help查看指令帮助")
     
+    if not sys.stdin.isatty():
+        # 管道/重定向输入：一次读完后逐行执行，不显示提示符
+        for cmd in sys.stdin.read().splitlines():
+            cmd = cmd.strip()
+            if cmd.lower() == '/exit':
+                break
+            try:
+                system.process_command(cmd)
+            except Exception as e:
+                print(f"运行时错误：{str(e)}")
+        print("系统已退出")
+        sys.exit()
+    
+    try:
+        import readline  # 提供行编辑和历史记录（部分平台没有该模块）
+    except ImportError:
+        pass
+    
     while True:
         try:
             cmd = input("\n>>> ").strip()
@@ -613,6 +787,9 @@ if __name__ == "__main__":
             system.process_command(cmd)
         except KeyboardInterrupt:
             print("\n检测到中断操作，输入/exit退出系统")
+        except EOFError:
+            print("\n系统已退出")
+            break
         except Exception as e:
             print(f"运行时错误：{str(e)}")
 
@@ -1,10 +1,14 @@
+import os
+import threading
 import tkinter as tk
 from tkinter import messagebox, filedialog, ttk, Toplevel, Label, Entry, Button, Text, Scrollbar, Frame, Listbox, LabelFrame
 from genetic_simulation_cn import GeneticSimulationSystem
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 import matplotlib.pyplot as plt
+from matplotlib import font_manager
 from matplotlib.font_manager import FontProperties
+import numpy as np
 
 class GeneticSimulationGUI:
     def __init__(self, master):
@@ -14,7 +18,14 @@ class GeneticSimulationGUI:
         self.current_group = None
         self.figure = None
         self.canvas = None
-        self.font = None
+        self.groups_shown = None
+        self.members_shown = None
+        self.genes_shown = None
+        self.chart_shown = None  # 图表当前显示的 (组别, 统计版本)
+        self.chart_dirty = False  # 图表隐藏期间有未绘制的更新
+        self.log_lines = 0
+        self.breeding = False  # 后台繁殖期间禁止其他操作访问模拟系统
+        self.setup_font()
         self.create_widgets()
         self.populate_groups_list()
         self.log_output("=== 系统已启动 ===")
@@ -47,8 +58,11 @@ class GeneticSimulationGUI:
             ("添加基因组合", self.add_genotype)
         ]
 
+        self.engine_widgets = [self.group_dropdown]  # 繁殖期间需要禁用的控件
         for text, command in buttons:
-            Button(self.menu_frame, text=text, command=command).pack(fill=tk.X, pady=5, padx=10)
+            button = Button(self.menu_frame, text=text, command=command)
+            button.pack(fill=tk.X, pady=5, padx=10)
+            self.engine_widgets.append(button)
 
         help_button = Button(self.menu_frame, text="帮助", command=self.show_help)
         help_button.place(x=170, y=10)  # 放置在右上角
@@ -90,18 +104,44 @@ class GeneticSimulationGUI:
         self.command_entry = Entry(self.command_frame, width=50)
         self.command_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
         self.command_entry.bind("<Return>", self.execute_command)
-        Button(self.command_frame, text="执行", command=self.execute_command).pack(side=tk.LEFT)
+        execute_button = Button(self.command_frame, text="执行", command=self.execute_command)
+        execute_button.pack(side=tk.LEFT)
+        self.engine_widgets += [self.command_entry, execute_button]
 
         self.chart_frame = LabelFrame(self.master, text="基因统计图表")
         self.chart_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        # 最小化后恢复时只有顶层窗口收到<Map>，图表框自身的映射状态不会改变
+        self.master.bind("<Map>", self.on_chart_visible)
 
         self.chart_canvas = None
         self.draw_initial_chart()
 
-        # 设置中文字体
-        self.font = FontProperties(fname=r"c:\windows\fonts\simsun.ttc", size=10)  # 宋体
+    def setup_font(self):
+        # 设置中文字体：只注册一次并写入rcParams，图表文字无需再逐个指定字体
+        font_path = r"c:\windows\fonts\simsun.ttc"  # 宋体
+        if not os.path.exists(font_path):
+            return  # 非Windows系统使用matplotlib默认字体
+        font_manager.fontManager.addfont(font_path)
+        plt.rcParams['font.sans-serif'] = [FontProperties(fname=font_path).get_name()] + plt.rcParams['font.sans-serif']
+
+    def set_engine_busy(self, busy):
+        """繁殖开始/结束时切换标志，并禁用/恢复所有会访问模拟系统的控件"""
+        self.breeding = busy
+        for widget in self.engine_widgets:
+            if widget is self.group_dropdown:
+                widget.config(state=tk.DISABLED if busy else "readonly")
+            else:
+                widget.config(state=tk.DISABLED if busy else tk.NORMAL)
+
+    def engine_busy(self):
+        """正在繁殖时提示并返回True；已打开的对话框和回车绑定也据此拦截"""
+        if self.breeding:
+            self.log_output("错误: 正在繁殖，请等待完成后再操作")
+        return self.breeding
 
     def on_group_select(self, event):
+        if self.engine_busy():
+            return
         group_name = self.group_var.get()
         if group_name != self.current_group:
             self.current_group = group_name
@@ -111,6 +151,10 @@ class GeneticSimulationGUI:
 
     def populate_groups_list(self):
         groups = list(self.system.groups.keys())
+        # 组别列表未变化时保留当前选择，不重复刷新
+        if groups == self.groups_shown:
+            return
+        self.groups_shown = groups
         self.group_dropdown["values"] = groups
         if groups:
             self.group_dropdown.current(0)
@@ -120,20 +164,27 @@ class GeneticSimulationGUI:
             self.log_output("已加载组别: " + groups[0])
 
     def populate_genes_list(self):
+        # 基因定义很少变化，版本号不变时跳过重绘
+        if self.genes_shown == self.system.genes_version:
+            return
+        self.genes_shown = self.system.genes_version
+
         self.genes_listbox.delete(0, tk.END)
         for gene_symbol, gene in self.system.genes.items():
             self.genes_listbox.insert(tk.END, f"基因 {gene_symbol}: 显性 {gene.dom_trait}, 隐性 {gene.rec_trait}")
 
     def display_group_members(self):
+        group = self.system.groups[self.current_group] if self.current_group else None
+        # 组别和当前代都未变化时无需重绘列表
+        shown = (self.current_group, group.stats_version) if group else None
+        if shown == self.members_shown:
+            return
+        self.members_shown = shown
+
         self.members_listbox.delete(0, tk.END)
-        if self.current_group:
-            group = self.system.groups[self.current_group]
-            members = group.current_generation
-            member_counts = {}
-            for member in members:
-                member_counts[member] = member_counts.get(member, 0) + 1
-            for member, count in member_counts.items():
-                self.members_listbox.insert(tk.END, f"{member} × {count}")
+        if group:
+            if group.current_generation:
+                self.members_listbox.insert(tk.END, *(f"{member} × {count}" for member, count in group.current_generation.items()))
 
     def add_gene(self):
         dialog = Toplevel(self.master)
@@ -155,6 +206,8 @@ class GeneticSimulationGUI:
         )).grid(row=len(fields), column=0, columnspan=2)
 
     def process_add_gene(self, dom, rec, dom_trait, rec_trait, dialog):
+        if self.engine_busy():
+            return
         try:
             self.system.process_command(f"/add {dom} {rec} {dom_trait} {rec_trait}")
             self.populate_genes_list()
@@ -172,6 +225,8 @@ class GeneticSimulationGUI:
         Button(dialog, text="创建", command=lambda: self.process_create_group(entry.get(), dialog)).pack()
 
     def process_create_group(self, group_name, dialog):
+        if self.engine_busy():
+            return
         if not group_name:
             self.log_output("错误: 组别名称不能为空")
             dialog.destroy()
@@ -190,13 +245,33 @@ class GeneticSimulationGUI:
         if not self.current_group:
             self.log_output("错误: 未选择组别")
             return
+        if self.engine_busy():
+            return
+        # 繁殖在后台线程进行，避免阻塞Tk事件循环；期间禁用其余操作，
+        # 保证只有这一个线程访问模拟系统
+        self.set_engine_busy(True)
+        threading.Thread(target=self.do_breed, args=(self.current_group,), daemon=True).start()
+
+    def do_breed(self, group_name):
+        error = None
         try:
-            response = self.system.process_command(f"/run {self.current_group}")
-            self.log_output("模拟运行完成")
+            self.system.process_command(f"/run {group_name}")
+        except Exception as e:
+            error = e
+        # 界面更新交回Tk主线程执行
+        self.master.after(0, self.on_breed_done, group_name, error)
+
+    def on_breed_done(self, group_name, error):
+        self.set_engine_busy(False)
+        if error is not None:
+            self.log_output(f"模拟运行失败: {str(error)}")
+            if self.chart_dirty:
+                self.update_chart()
+            return
+        self.log_output("模拟运行完成")
+        if group_name == self.current_group:
             self.display_group_members()
             self.update_chart()
-        except Exception as e:
-            self.log_output(f"模拟运行失败: {str(e)}")
 
     def change_mode(self):
         if not self.current_group:
@@ -204,6 +279,8 @@ class GeneticSimulationGUI:
             return
 
         def choose_mode(mode):
+            if self.engine_busy():
+                return
             try:
                 self.system.process_command(f"/mode {self.current_group} {mode}")
                 self.log_output(f"交配模式已切换为: {mode}")
@@ -226,35 +303,15 @@ class GeneticSimulationGUI:
             return
         try:
             stats = self.system.groups[self.current_group].get_statistics(self.system.genes, details=True)
-            details = f"=== {self.current_group} 统计详情 ===\n\n"
-            details += "基因型分布：\n"
-            for geno, info in stats['genotypes'].items():
-                details += f"  {geno}: {info['count']} ({info['ratio'] * 100:.2f}%)\n"
+            lines = [f"=== {self.current_group} 统计详情 ===", "", "基因型分布："]
+            lines.extend(f"  {geno}: {info['count']} ({info['ratio'] * 100:.2f}%)"
+                         for geno, info in stats['genotypes'].items())
 
-            details += "\n表型分布：\n"
-            for pheno, info in stats['phenotypes'].items():
-                details += f"  {pheno}: {info['count']} ({info['ratio'] * 100:.2f}%)\n"
+            lines.extend(["", "表型分布："])
+            lines.extend(f"  {pheno}: {info['count']} ({info['ratio'] * 100:.2f}%)"
+                         for pheno, info in stats['phenotypes'].items())
 
-            self.display_details_window(details)
-        except Exception as e:
-            self.log_output(f"获取详细信息失败: {str(e)}")
-
-    def show_group_details(self):
-        if not self.current_group:
-            self.log_output("错误: 未选择组别")
-            return
-        try:
-            stats = self.system.groups[self.current_group].get_statistics(self.system.genes, details=True)
-            details = f"=== {self.current_group} 统计详情 ===\n\n"
-            details += "基因型分布：\n"
-            for geno, info in stats['genotypes'].items():
-                details += f"  {geno}: {info['count']} ({info['ratio'] * 100:.2f}%)\n"
-
-            details += "\n表型分布：\n"
-            for pheno, info in stats['phenotypes'].items():
-                details += f"  {pheno}: {info['count']} ({info['ratio'] * 100:.2f}%)\n"
-
-            self.display_details_window(details)
+            self.display_details_window("\n".join(lines) + "\n")
         except Exception as e:
             self.log_output(f"获取详细信息失败: {str(e)}")
 
@@ -269,6 +326,7 @@ class GeneticSimulationGUI:
     def load_commands(self):
         file_path = filedialog.askopenfilename()
         if file_path:
+            # 整个文件执行完后统一刷新一次界面
             try:
                 response = self.system.process_command(f"/load {file_path}")
                 if response:
@@ -277,6 +335,8 @@ class GeneticSimulationGUI:
                     self.log_output("指令加载成功")
             except Exception as e:
                 self.log_output(f"指令加载失败: {str(e)}")
+            finally:
+                self.refresh_ui()
 
     def delete_selected(self):
         selected = self.members_listbox.curselection()
@@ -290,7 +350,7 @@ class GeneticSimulationGUI:
                 self.log_output(response)
             else:
                 self.log_output(f"成功删除个体: {member}")
-            self.display_group_members()
+            self.refresh_ui()
         except Exception as e:
             self.log_output(f"删除个体失败: {str(e)}")
 
@@ -312,6 +372,8 @@ class GeneticSimulationGUI:
         )).grid(row=len(fields), column=0, columnspan=2)
 
     def process_add_genotype(self, genotype, amount, dialog):
+        if self.engine_busy():
+            return
         if not genotype or not amount:
             self.log_output("错误: 请输入完整的基因型和数量")
             dialog.destroy()
@@ -325,7 +387,7 @@ class GeneticSimulationGUI:
                 self.log_output(response)
             else:
                 self.log_output(f"成功添加 {amount} 个个体到组别 {self.current_group}: {genotype}")
-            self.display_group_members()
+            self.refresh_ui()
             dialog.destroy()
         except Exception as e:
             self.log_output(f"添加个体失败: {str(e)}")
@@ -335,50 +397,129 @@ class GeneticSimulationGUI:
         self.figure = Figure(figsize=(6, 4), dpi=100)
         self.subplot1 = self.figure.add_subplot(211)
         self.subplot2 = self.figure.add_subplot(212)
-        self.subplot1.set_title("基因型分布", fontproperties=self.font)
-        self.subplot2.set_title("表型分布", fontproperties=self.font)
-        self.subplot1.set_ylabel("数量", fontproperties=self.font)
-        self.subplot2.set_ylabel("数量", fontproperties=self.font)
+        self.subplot1.set_title("基因型分布")
+        self.subplot2.set_title("表型分布")
+        self.subplot1.set_ylabel("数量")
+        self.subplot2.set_ylabel("数量")
+
+        # 柱形设为animated，由blit单独绘制，坐标轴/标题等背景只在整体重绘时渲染
+        self.bars1 = self.subplot1.bar([], [], animated=True)
+        self.bars2 = self.subplot2.bar([], [], animated=True)
+        self.chart_group = None
+        self.known_genotypes = ()  # 已出现过的类别，排序后作为固定的x轴
+        self.known_phenotypes = ()
+        self.bg1 = None
+        self.bg2 = None
 
         self.chart_canvas = FigureCanvasTkAgg(self.figure, master=self.chart_frame)
         self.chart_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-        self.chart_canvas.draw()
+        self.chart_canvas.mpl_connect("draw_event", self.on_chart_draw)
+        self.figure.tight_layout()
+        self.chart_canvas.draw_idle()
+
+    def on_chart_draw(self, event):
+        # 每次整体重绘（含窗口缩放）后重新缓存背景并补画柱形
+        self.bg1 = self.chart_canvas.copy_from_bbox(self.subplot1.bbox)
+        self.bg2 = self.chart_canvas.copy_from_bbox(self.subplot2.bbox)
+        for subplot, bars in ((self.subplot1, self.bars1), (self.subplot2, self.bars2)):
+            for rect in bars:
+                subplot.draw_artist(rect)
+
+    def rebuild_bars(self, subplot, bars, labels, counts):
+        """类别或纵轴范围变化时重建柱形"""
+        bars.remove()
+        positions = range(len(labels))
+        new_bars = subplot.bar(positions, counts, color="C0", animated=True)
+        subplot.set_xticks(positions)
+        subplot.set_xticklabels(labels)
+        subplot.set_xlim(-0.5, max(len(labels), 1) - 0.5)
+        subplot.set_ylim(0, max(counts, default=0) * 1.25 or 1)
+        return new_bars
+
+    def needs_rescale(self, subplot, counts):
+        top = subplot.get_ylim()[1]
+        peak = max(counts, default=0)
+        return peak > top or peak * 4 < top
+
+    def on_chart_visible(self, event):
+        if self.breeding:
+            # 繁殖线程仍在修改组别，留待on_breed_done重绘
+            self.chart_dirty = True
+            return
+        if self.chart_dirty:
+            self.update_chart()
 
-    def update_chart(self):
+    def update_chart(self, stats=None):
         if not self.current_group:
             return
+        if not self.chart_frame.winfo_viewable():
+            # 图表不可见时只标记待刷新，重新显示时再绘制
+            self.chart_dirty = True
+            return
+        self.chart_dirty = False
+
+        group = self.system.groups[self.current_group]
+        self.chart_shown = (self.current_group, group.stats_version)
+        if stats is None:
+            stats = group.get_statistics(self.system.genes, details=True)
+
+        genotypes = stats['genotypes']
+        phenotypes = {str(pheno): info for pheno, info in stats['phenotypes'].items()}
+
+        # x轴类别只增不减并保持排序，已消失的类别显示为0，坐标轴才能跨代复用
+        relayout = self.bg1 is None
+        if self.chart_group != self.current_group:
+            self.chart_group = self.current_group
+            self.known_genotypes = ()
+            self.known_phenotypes = ()
+        if not genotypes.keys() <= set(self.known_genotypes):
+            self.known_genotypes = tuple(sorted(set(self.known_genotypes).union(genotypes)))
+            relayout = True
+        if not phenotypes.keys() <= set(self.known_phenotypes):
+            self.known_phenotypes = tuple(sorted(set(self.known_phenotypes).union(phenotypes)))
+            relayout = True
+
+        genotype_counts = np.fromiter((genotypes[g]['count'] if g in genotypes else 0 for g in self.known_genotypes),
+                                      dtype=np.int32, count=len(self.known_genotypes))
+        phenotype_counts = np.fromiter((phenotypes[p]['count'] if p in phenotypes else 0 for p in self.known_phenotypes),
+                                       dtype=np.int32, count=len(self.known_phenotypes))
+
+        if (relayout
+                or self.needs_rescale(self.subplot1, genotype_counts)
+                or self.needs_rescale(self.subplot2, phenotype_counts)):
+            self.bars1 = self.rebuild_bars(self.subplot1, self.bars1, self.known_genotypes, genotype_counts)
+            self.bars2 = self.rebuild_bars(self.subplot2, self.bars2, self.known_phenotypes, phenotype_counts)
+            # 背景已失效，等待空闲时合并重绘后再恢复blit
+            self.bg1 = None
+            self.bg2 = None
+            self.chart_canvas.draw_idle()
+            return
 
-        stats = self.system.groups[self.current_group].get_statistics(self.system.genes, details=True)
-
-        self.subplot1.clear()
-        self.subplot2.clear()
-
-        genotypes = list(stats['genotypes'].keys())
-        genotype_counts = [info['count'] for info in stats['genotypes'].values()]
-        self.subplot1.bar(genotypes, genotype_counts)
-        self.subplot1.set_title("基因型分布", fontproperties=self.font)
-        self.subplot1.set_ylabel("数量", fontproperties=self.font)
-
-        phenotypes = [str(pheno) for pheno in stats['phenotypes'].keys()]
-        phenotype_counts = [info['count'] for info in stats['phenotypes'].values()]
-        self.subplot2.bar(phenotypes, phenotype_counts)
-        self.subplot2.set_title("表型分布", fontproperties=self.font)
-        self.subplot2.set_ylabel("数量", fontproperties=self.font)
-
-        self.figure.tight_layout()
-        self.chart_canvas.draw()
+        # 仅柱高变化：恢复缓存背景，只重绘柱形
+        for bars, counts in ((self.bars1, genotype_counts), (self.bars2, phenotype_counts)):
+            for rect, count in zip(bars, counts):
+                rect.set_height(count)
+        for subplot, bg, bars in ((self.subplot1, self.bg1, self.bars1),
+                                  (self.subplot2, self.bg2, self.bars2)):
+            self.chart_canvas.restore_region(bg)
+            for rect in bars:
+                subplot.draw_artist(rect)
+            self.chart_canvas.blit(subplot.bbox)
 
     def log_output(self, message):
-        self.log_text.insert(tk.END, f"{message}\n")
+        text = f"{message}\n"
+        self.log_text.insert(tk.END, text)
         self.log_text.see(tk.END)
-        max_chars = 10000
-        current_chars = len(self.log_text.get("1.0", tk.END))
-        if current_chars > max_chars:
-            self.log_text.delete("1.0", f"1.0+{current_chars - max_chars}c")
+        # 自行累计行数，超出上限时只删除最早的几行，不必读取整个日志
+        max_lines = 500
+        self.log_lines += text.count("\n")
+        if self.log_lines > max_lines:
+            self.log_text.delete("1.0", f"{self.log_lines - max_lines + 1}.0")
+            self.log_lines = max_lines
 
     def execute_command(self, event=None):
         command = self.command_entry.get().strip()
-        if not command:
+        if not command or self.engine_busy():
             return
         try:
             response = self.system.process_command(command)
@@ -387,14 +528,23 @@ class GeneticSimulationGUI:
             else:
                 self.log_output(f">>> {command}")
             
-            # 刷新 UI
-            self.populate_groups_list()
-            self.display_group_members()
-            self.populate_genes_list()
+            self.refresh_ui()
         except Exception as e:
             self.log_output(f"!!! 执行指令失败: {str(e)}")
         self.command_entry.delete(0, tk.END)
 
+    def refresh_ui(self):
+        # 各列表和图表自行比较版本，只重绘实际变化的部分
+        self.populate_groups_list()
+        self.display_group_members()
+        self.populate_genes_list()
+        if self.current_group:
+            group = self.system.groups[self.current_group]
+            if (self.current_group, group.stats_version) != self.chart_shown:
+                # 统计只计算一次，图表直接复用
+                self.update_chart(group.get_statistics(self.system.genes, details=True))
+        self.master.update_idletasks()
+
     def show_help(self):
         help_text = """
        遗传学模拟系统是一款基于Python的软件，旨在帮助用户模拟孟德尔遗传规律。以下是具体使用方法：